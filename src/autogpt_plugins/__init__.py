@@ -1,12 +1,7 @@
 """This is the trello plugin for Auto-GPT"""
 from typing import Any, Dict, List, Optional, Tuple, TypeVar, TypedDict
 from auto_gpt_plugin_template import AutoGPTPluginTemplate
-from colorama import Fore
-from .pm_plugins.trello_plugin.trello_plugin import (
-    Trello,
-    trello_config_file_exists,
-    trello_api_key_set,
-)
+from .pm_plugins import create_pm_backend
 
 PromptGenerator = TypeVar("PromptGenerator")
 
@@ -26,8 +21,7 @@ class AutoGPTPMPlugin(AutoGPTPluginTemplate):
         self._name = "Auto-GPT-PM-Plugin"
         self._version = "0.1.0"
         self._description = "Auto-GPT PM Plugin: Streamlize Workflow."
-        if trello_config_file_exists() and trello_api_key_set():
-            self.cli_trello = Trello()
+        self.pm_backend = create_pm_backend()
 
     def can_handle_on_response(self) -> bool:
         """This method is called to check that the plugin can
@@ -59,13 +53,11 @@ class AutoGPTPMPlugin(AutoGPTPluginTemplate):
         Returns:
             PromptGenerator: The prompt generator.
         """
-        if self.cli_trello:
-            prompt.add_command(
-                "Get Doing Tasks Status",
-                "get_doing_tasks_status",
-                {},
-                self.cli_trello.get_doing_tasks_status,
-            )
+        if self.pm_backend:
+            for command in self.pm_backend.get_commands():
+                prompt.add_command(
+                    command.label, command.name, command.arguments, command.function
+                )
         return prompt
 
     def can_handle_on_planning(self) -> bool:
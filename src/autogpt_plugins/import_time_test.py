@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+from .pm_plugins import PM_BACKENDS, create_pm_backend
+
+# generous budget for the cumulative import time of the plugin package
+IMPORT_TIME_BUDGET_US = 500_000
+# modules that must only be imported once a command runs
+DEFERRED_MODULES = [
+    "requests",
+    "yaml",
+    "dateutil",
+    "colorama",
+    "autogpt_plugins.pm_plugins.pm_backend",
+    "autogpt_plugins.pm_plugins.trello_plugin.trello_plugin",
+]
+
+
+def measure_import_time(module: str):
+    """Import module in a fresh interpreter with python -X importtime.
+
+    Returns:
+        Dict[str, int]: The cumulative import time in microseconds of every
+            module that got imported.
+    """
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=src_dir)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, imported_module = line.split("|")
+        import_times[imported_module.strip()] = int(cumulative)
+    return import_times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_time(self):
+        import_times = measure_import_time("autogpt_plugins")
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, import_times)
+        self.assertLess(import_times["autogpt_plugins"], IMPORT_TIME_BUDGET_US)
+
+    @patch.dict(os.environ, {"PM_BACKEND": "trello"})
+    def test_backend_created_on_first_command(self):
+        spec = PM_BACKENDS["trello"]
+        backend = MagicMock()
+        backend.setup.return_value = None
+        backend.get_doing_tasks_status.return_value = "status"
+        with patch.object(spec, "is_configured", return_value=True), patch.object(
+            spec, "create", return_value=backend
+        ) as create:
+            pm_backend = create_pm_backend()
+            commands = {command.name: command for command in pm_backend.get_commands()}
+            create.assert_not_called()
+            self.assertEqual(commands["get_doing_tasks_status"].function(), "status")
+            commands["get_card_status"].function(card_id="card_id")
+            create.assert_called_once()
+            backend.get_card_status.assert_called_once_with(card_id="card_id")
+
+    @patch.dict(os.environ, {"PM_BACKEND": "trello"})
+    def test_backend_setup_failure(self):
+        spec = PM_BACKENDS["trello"]
+        backend = MagicMock()
+        backend.setup.return_value = "Unable to connect to Trello: timed out\n"
+        backend.request_config.circuit_reset_timeout = 60
+        with patch.object(spec, "is_configured", return_value=True), patch.object(
+            spec, "create", return_value=backend
+        ) as create:
+            pm_backend = create_pm_backend()
+            commands = {command.name: command for command in pm_backend.get_commands()}
+            for _ in range(2):
+                self.assertEqual(
+                    commands["get_doing_tasks_status"].function(),
+                    "Unable to connect to Trello: timed out\n",
+                )
+            # the setup is not run again until the reset timeout has passed
+            create.assert_called_once()
+            backend.get_doing_tasks_status.assert_not_called()
+
+    @patch.dict(os.environ, {"PM_BACKEND": "trello"})
+    def test_offline_backend_commands(self):
+        spec = PM_BACKENDS["trello"]
+        with patch.object(spec, "is_configured", return_value=False), patch.object(
+            spec, "is_configured_offline", return_value=True
+        ), patch.object(spec, "create") as create:
+            pm_backend = create_pm_backend()
+            commands = [command.name for command in pm_backend.get_commands()]
+            self.assertEqual(commands, ["analyze_export_file"])
+            create.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""The project management backends of the Auto-GPT PM plugin
+
+Backends are registered with their commands and created lazily, so importing
+the plugin does not import the backend clients and their dependencies.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from .pm_command import PMCommand
+from .trello_plugin import (
+    TRELLO_COMMANDS,
+    TRELLO_OFFLINE_COMMANDS,
+    create_trello_backend,
+    trello_config_file_exists,
+    trello_configured,
+)
+
+if TYPE_CHECKING:
+    from .pm_backend import PMBackend
+
+
+@dataclass
+class PMBackendSpec:
+    is_configured: Callable[[], bool]
+    create: Callable[[], "PMBackend"]
+    commands: List[PMCommand]
+    # commands run without the backend API, when only their config is set
+    offline_commands: Dict[str, Callable[..., str]] = field(default_factory=dict)
+    is_configured_offline: Callable[[], bool] = lambda: False
+
+
+# registered backends by name, selected with the PM_BACKEND environment variable
+PM_BACKENDS = {
+    "trello": PMBackendSpec(
+        is_configured=trello_configured,
+        create=create_trello_backend,
+        commands=TRELLO_COMMANDS,
+        offline_commands=TRELLO_OFFLINE_COMMANDS,
+        is_configured_offline=trello_config_file_exists,
+    ),
+}
+
+
+class LazyPMBackend:
+    """Create the backend the first time one of its commands runs.
+
+    An offline backend only exposes the commands that do not need the API. A
+    backend that fails to connect is only set up again once its circuit reset
+    timeout has passed, until then its commands return the setup error.
+    """
+
+    def __init__(self, spec: PMBackendSpec, offline: bool = False):
+        self.spec = spec
+        self.offline = offline
+        self._backend = None
+        self._setup_error = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _get_backend(self) -> Tuple[Optional["PMBackend"], Optional[str]]:
+        """Return the backend, or the reason it is not available."""
+        with self._lock:
+            if self._backend is None:
+                if time.monotonic() < self._retry_at:
+                    return None, self._setup_error
+                backend = self.spec.create()
+                setup_error = backend.setup()
+                if setup_error:
+                    self._setup_error = setup_error
+                    self._retry_at = (
+                        time.monotonic() + backend.request_config.circuit_reset_timeout
+                    )
+                    return None, setup_error
+                self._backend = backend
+            return self._backend, None
+
+    def get_commands(self) -> List[PMCommand]:
+        commands = []
+        for command in self.spec.commands:
+            if command.name in self.spec.offline_commands:
+                commands.append(command.bind(self.spec.offline_commands[command.name]))
+            elif not self.offline:
+                commands.append(command.bind(self._run(command.name)))
+        return commands
+
+    def _run(self, command_name: str) -> Callable[..., str]:
+        def run(*args, **kwargs) -> str:
+            backend, setup_error = self._get_backend()
+            if not backend:
+                return setup_error
+            return getattr(backend, command_name)(*args, **kwargs)
+
+        return run
+
+
+def create_pm_backend() -> Optional[LazyPMBackend]:
+    """Return the backend selected by PM_BACKEND if it is configured."""
+    backend_name = os.getenv("PM_BACKEND", "trello").lower()
+    spec = PM_BACKENDS.get(backend_name)
+    if not spec:
+        return None
+    if spec.is_configured():
+        return LazyPMBackend(spec)
+    if spec.offline_commands and spec.is_configured_offline():
+        return LazyPMBackend(spec, offline=True)
+    return None
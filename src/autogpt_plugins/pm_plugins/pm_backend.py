@@ -0,0 +1,921 @@
+"""Shared core of the project management backends.
+
+A backend talks to one project management tool. It implements the small
+interface of PMBackend and inherits the request layer (timeouts, retries,
+circuit breaker, snapshots, request coalescing and pluggable transports),
+batching and concurrency helpers and the status command pipeline.
+"""
+
+import asyncio
+import copy
+import gzip
+import hashlib
+import json
+import random
+import requests
+import threading
+import time
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half open"
+
+
+class RequestError(Exception):
+    """Raised when an API request fails and no snapshot can be served."""
+
+
+class DeadlineExceeded(RequestError):
+    """Raised when the deadline budget of the current operation is used up."""
+
+
+class CircuitOpenError(RequestError):
+    """Raised when the circuit breaker rejects a request during an outage."""
+
+
+class CassetteMissError(RequestError):
+    """Raised when a replayed request was never recorded in the cassette."""
+
+
+def to_timestamp(date: Optional[datetime]) -> Optional[int]:
+    return int(date.timestamp()) if date else None
+
+
+@dataclass(frozen=True)
+class TimeContext:
+    """A fixed point in time shared by every check of a classification pass."""
+
+    # epoch seconds
+    now: int
+    idle_threshold: int
+
+    @classmethod
+    def create(
+        cls, idle_threshold: int, now: Optional[datetime] = None
+    ) -> "TimeContext":
+        """Create a context from an idle threshold given in minutes."""
+        now = now if now else datetime.now(timezone.utc)
+        return cls(now=to_timestamp(now), idle_threshold=idle_threshold * 60)
+
+
+@dataclass
+class RequestConfig:
+    # seconds allowed for a single HTTP call
+    request_timeout: float = 10.0
+    # seconds allowed for a whole status command, retries included
+    status_deadline: float = 30.0
+    # extra attempts for idempotent GET requests
+    max_retries: int = 3
+    # base and cap (in seconds) of the jittered exponential backoff
+    retry_backoff: float = 0.5
+    retry_backoff_max: float = 8.0
+    # consecutive failures that open the circuit, and seconds it stays open
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 60.0
+    # GET responses kept as snapshots, the least recently used are dropped
+    max_snapshots: int = 128
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> "RequestConfig":
+        if not config:
+            return cls()
+        return cls(
+            **{
+                field: config[field]
+                for field in cls.__dataclass_fields__
+                if config.get(field) is not None
+            }
+        )
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.failure_count = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == CircuitState.CLOSED:
+                return True
+            if self.state == CircuitState.OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+            elif now - self.probe_started_at < self.reset_timeout:
+                # a trial request is already probing the API
+                return False
+            # let a single trial request through to probe the API, a probe
+            # that never reported back is replaced after reset_timeout
+            self.state = CircuitState.HALF_OPEN
+            self.probe_started_at = now
+            return True
+
+    def release_probe(self):
+        """Give up the trial request without an outcome, e.g. on a local error."""
+        with self._lock:
+            if self.state == CircuitState.HALF_OPEN:
+                self.state = CircuitState.OPEN
+
+    def record_success(self):
+        with self._lock:
+            self.state = CircuitState.CLOSED
+            self.failure_count = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failure_count += 1
+            if (
+                self.state == CircuitState.HALF_OPEN
+                or self.failure_count >= self.failure_threshold
+            ):
+                self.state = CircuitState.OPEN
+                self.opened_at = time.monotonic()
+
+
+class InFlightRequest:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """Merge identical in-flight requests into a single network call.
+
+    The first caller of a key (the leader) performs the request, every caller
+    that arrives while it is running waits for it and receives its own copy of
+    the parsed result, or the same error. Waiters raise DeadlineExceeded when
+    the result does not arrive within their own timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._async_in_flight = {}
+
+    def run(self, key: Tuple, fetch, timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = InFlightRequest()
+                self._in_flight[key] = in_flight
+            else:
+                in_flight.waiters += 1
+        if not leader:
+            if not in_flight.done.wait(timeout):
+                raise DeadlineExceeded(f"{key[0]} {key[1]}: out of budget")
+            if in_flight.error:
+                raise in_flight.error
+            return copy.deepcopy(in_flight.result)
+        try:
+            in_flight.result = fetch()
+        except Exception as exc:
+            in_flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+        # waiters copy the shared result, so the leader must not hand it out
+        if in_flight.waiters:
+            return copy.deepcopy(in_flight.result)
+        return in_flight.result
+
+    async def run_async(self, key: Tuple, fetch) -> Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        with self._lock:
+            in_flight = self._async_in_flight.get(flight_key)
+            leader = in_flight is None
+            if leader:
+                # the future and the number of followers waiting for it
+                in_flight = [loop.create_future(), 0]
+                self._async_in_flight[flight_key] = in_flight
+            else:
+                in_flight[1] += 1
+        future = in_flight[0]
+        if not leader:
+            return copy.deepcopy(await asyncio.shield(future))
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # the leader re-raises, followers (if any) read it from the future
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._async_in_flight[flight_key]
+        if in_flight[1]:
+            return copy.deepcopy(result)
+        return result
+
+
+class HTTPTransport:
+    """Send requests to the API over the network."""
+
+    def send(
+        self, action: str, url: str, params: Dict, headers: Dict, timeout: float
+    ) -> Any:
+        return requests.request(
+            action, url, params=params, headers=headers, timeout=timeout
+        )
+
+
+@dataclass
+class CassetteResponse:
+    status_code: int
+    text: str
+
+
+class CassetteTransport:
+    """Record API interactions to a gzip compressed cassette and replay them.
+
+    Replayed responses are looked up by method, url and params rather than by
+    the order of the calls. A request recorded several times replays its
+    responses in order and then keeps repeating the last one. The api key and
+    token are never written to the cassette.
+    """
+
+    RECORD = "record"
+    REPLAY = "replay"
+    SECRET_PARAMS = {"key", "token"}
+
+    def __init__(
+        self,
+        cassette_file: str,
+        mode: str = REPLAY,
+        transport: Optional[HTTPTransport] = None,
+        latency: float = 0.0,
+        replay_recorded_latency: bool = False,
+    ):
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError(
+                f"Unknown cassette mode {mode!r}, use {self.RECORD!r} or "
+                f"{self.REPLAY!r}"
+            )
+        self.cassette_file = cassette_file
+        self.mode = mode
+        self.transport = transport if transport else HTTPTransport()
+        # seconds added to every replayed response
+        self.latency = latency
+        # also wait for as long as the recorded response originally took
+        self.replay_recorded_latency = replay_recorded_latency
+        self.interactions = []
+        self._replay_positions = {}
+        self._lock = threading.Lock()
+        if mode == self.REPLAY:
+            with gzip.open(cassette_file, "rt", encoding="utf-8") as stream:
+                self.interactions = json.load(stream)["interactions"]
+        self._responses = {}
+        for interaction in self.interactions:
+            key = self._interaction_key(**interaction["request"])
+            self._responses.setdefault(key, []).append(interaction["response"])
+
+    def _public_params(self, params: Dict) -> Dict:
+        return {
+            key: str(value)
+            for key, value in params.items()
+            if key not in self.SECRET_PARAMS
+        }
+
+    def _interaction_key(self, method: str, url: str, params: Dict) -> Tuple:
+        return (method.upper(), url, tuple(sorted(params.items())))
+
+    def send(
+        self, action: str, url: str, params: Dict, headers: Dict, timeout: float
+    ) -> Any:
+        params = self._public_params(params if params else {})
+        if self.mode == self.RECORD:
+            return self._record(action, url, params, headers, timeout)
+        key = self._interaction_key(method=action, url=url, params=params)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise CassetteMissError(f"{action} {url}: not in cassette")
+            position = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = position + 1
+        response = responses[min(position, len(responses) - 1)]
+        delay = self.latency
+        if self.replay_recorded_latency:
+            delay += response["elapsed"]
+        # a response slower than the timeout times out like a real request
+        if timeout and delay > timeout:
+            time.sleep(timeout)
+            raise requests.Timeout(f"{action} {url}: timed out after {timeout}s")
+        if delay > 0:
+            time.sleep(delay)
+        return CassetteResponse(
+            status_code=response["status_code"], text=response["text"]
+        )
+
+    def _record(
+        self, action: str, url: str, params: Dict, headers: Dict, timeout: float
+    ) -> Any:
+        start = time.monotonic()
+        response = self.transport.send(action, url, params, headers, timeout)
+        interaction = {
+            "request": {"method": action.upper(), "url": url, "params": params},
+            "response": {
+                "status_code": response.status_code,
+                "text": response.text,
+                "elapsed": time.monotonic() - start,
+            },
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+        return response
+
+    def save(self):
+        with self._lock:
+            with gzip.open(self.cassette_file, "wt", encoding="utf-8") as stream:
+                json.dump({"interactions": self.interactions}, stream)
+
+
+@dataclass
+class CardUpdate:
+    card_id: str
+    comment: Optional[str] = None
+    complete: bool = False
+    list_id: Optional[str] = None
+
+
+@dataclass
+class CardState:
+    # hash of the card json the state was built from
+    content_hash: str
+    card: Any
+    # report sections the card appeared in
+    statuses: frozenset
+    issues: frozenset
+
+
+class PMBackend(ABC):
+    """Base class of the project management backends.
+
+    The status commands are built here from the backend hooks: the cards of a
+    list are parsed, their checklists fetched, then classified and rendered by
+    the backend. Cards are the objects returned by parse_card, they have an id,
+    checklists and the issues found when they are classified.
+    """
+
+    # name of the tool, used in messages shown to the agent
+    name = "PM"
+    # report section of the completed cards, which are moved to done
+    complete_status = None
+    # maximum number of items a single call of a batch endpoint accepts
+    batch_limit = 1
+    # threads used to fan out requests that can not be batched
+    max_workers = 8
+
+    def __init__(
+        self,
+        request_config: RequestConfig,
+        idle_threshold: int,
+        transport: Optional[HTTPTransport] = None,
+        clock: Optional[Callable[[], datetime]] = None,
+    ):
+        self.request_config = request_config
+        # minutes without activity after which a card is idle
+        self.idle_threshold = idle_threshold
+        self.transport = transport if transport else HTTPTransport()
+        # returns the current time, replaced by a fixed clock in tests
+        self.clock = clock if clock else lambda: datetime.now(timezone.utc)
+        self.query = {}
+        self.headers = {}
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=request_config.circuit_failure_threshold,
+            reset_timeout=request_config.circuit_reset_timeout,
+        )
+        # text of the last good response of recent GET requests, served when
+        # the API is down
+        self.snapshots = OrderedDict()
+        self._snapshots_lock = threading.Lock()
+        self._request_state = threading.local()
+        self.coalescer = RequestCoalescer()
+        # classification of each doing card at the previous status check
+        self.card_states = {}
+
+    @abstractmethod
+    def get_doing_list_id(self) -> str:
+        """Return the id of the list of the tasks in progress."""
+
+    @abstractmethod
+    def list_cards(self, list_id: str) -> List[Dict]:
+        """Return the json of the cards of a list."""
+
+    @abstractmethod
+    def parse_card(self, card_json: Dict) -> Any:
+        """Build a card from its json, without its checklists."""
+
+    @abstractmethod
+    def get_cards_with_checklists(
+        self, card_ids: List[str]
+    ) -> Tuple[List[Any], List[str]]:
+        """Return the cards with their checklists and the ids not found."""
+
+    @abstractmethod
+    def fetch_card_checklists(self, card_id: str) -> List[Any]:
+        """Return the checklists of a single card."""
+
+    @abstractmethod
+    def update_card(self, update: CardUpdate):
+        """Apply a single card update."""
+
+    @abstractmethod
+    def complete_card_update(self, card: Any) -> CardUpdate:
+        """Return the update closing a completed card and moving it to done."""
+
+    @abstractmethod
+    def classify_cards(
+        self, cards: List[Any], time_context: TimeContext
+    ) -> Dict[Any, List[Any]]:
+        """Group cards by the report section they belong to."""
+
+    @abstractmethod
+    def render_report(
+        self, classified: Dict[Any, List[Any]], update_cards: bool = True
+    ) -> str:
+        """Render the classified cards as a status report."""
+
+    @abstractmethod
+    def render_changes(
+        self,
+        transitions: Dict[Any, List[Any]],
+        resolved_cards: List[Tuple[Any, frozenset]],
+    ) -> str:
+        """Render the cards new to a report section and the resolved issues."""
+
+    def connect(self):
+        """Fetch what the backend needs from the API before its first command."""
+
+    def setup(self) -> Optional[str]:
+        """Connect within the status deadline budget.
+
+        Returns:
+            Optional[str]: The reason the backend could not connect, if any.
+        """
+        with self.request_deadline(self.request_config.status_deadline):
+            try:
+                self.connect()
+            except RequestError as exc:
+                return f"Unable to connect to {self.name}: {exc}\n"
+        return None
+
+    def parse_card_reference(self, card_reference: str) -> str:
+        """Turn a card reference given by the agent into a card id."""
+        return card_reference.strip()
+
+    def fetch_checklists(self, card_ids: List[str]) -> Dict[str, List[Any]]:
+        """Return the checklists of several cards keyed by card id.
+
+        Fetches the cards concurrently, backends with a batch endpoint override
+        this to fetch them in batches of batch_limit cards. Cards whose
+        checklists could not be fetched are left out.
+        """
+        checklists = self.map_concurrently(self.fetch_card_checklists, card_ids)
+        return dict(zip(card_ids, checklists))
+
+    def bulk_update(self, updates: List[CardUpdate]):
+        """Apply card updates concurrently."""
+        self.map_concurrently(self.update_card, updates)
+
+    def batched(self, items: List[Any]) -> Iterator[List[Any]]:
+        for start in range(0, len(items), self.batch_limit):
+            yield items[start : start + self.batch_limit]
+
+    def map_concurrently(self, function: Callable, items: List[Any]) -> List[Any]:
+        """Call function on every item from a thread pool, keeping the order.
+
+        The worker threads share the deadline of the calling thread, and the
+        caller is flagged as degraded when any of them served a snapshot.
+        """
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        deadline = getattr(self._request_state, "deadline", None)
+
+        def run(item):
+            self._request_state.deadline = deadline
+            self._request_state.degraded = False
+            try:
+                return function(item), self.is_degraded()
+            finally:
+                self._request_state.deadline = None
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(items))
+        ) as executor:
+            results = list(executor.map(run, items))
+        if any(degraded for _, degraded in results):
+            self._request_state.degraded = True
+        return [result for result, _ in results]
+
+    @contextmanager
+    def request_deadline(self, seconds: float):
+        """Bound every request issued inside the block by an overall budget."""
+        state = self._request_state
+        previous_deadline = getattr(state, "deadline", None)
+        deadline = time.monotonic() + seconds
+        if previous_deadline is not None:
+            deadline = min(deadline, previous_deadline)
+        state.deadline = deadline
+        state.degraded = False
+        try:
+            yield
+        finally:
+            state.deadline = previous_deadline
+
+    def is_degraded(self) -> bool:
+        """Whether a snapshot was served inside the current deadline block."""
+        return getattr(self._request_state, "degraded", False)
+
+    def _remaining_budget(self) -> Optional[float]:
+        deadline = getattr(self._request_state, "deadline", None)
+        if deadline is None:
+            return None
+        return deadline - time.monotonic()
+
+    def _request_key(self, url: str, action: str, query: Dict) -> Tuple:
+        return (
+            action.upper(),
+            url,
+            tuple(sorted((key, str(value)) for key, value in query.items())),
+        )
+
+    def _backoff_delay(self, attempt: int) -> float:
+        request_config = self.request_config
+        ceiling = min(
+            request_config.retry_backoff_max,
+            request_config.retry_backoff * (2**attempt),
+        )
+        return random.uniform(0, ceiling)
+
+    def _store_snapshot(self, key: Tuple, response_text: str):
+        with self._snapshots_lock:
+            self.snapshots[key] = response_text
+            self.snapshots.move_to_end(key)
+            while len(self.snapshots) > self.request_config.max_snapshots:
+                self.snapshots.popitem(last=False)
+
+    def _serve_snapshot(self, key: Tuple, error: RequestError) -> Any:
+        with self._snapshots_lock:
+            if key not in self.snapshots:
+                raise error
+            self.snapshots.move_to_end(key)
+            response_text = self.snapshots[key]
+        self._request_state.degraded = True
+        return json.loads(response_text)
+
+    def _send_api_request(
+        self,
+        url: str,
+        action: str,
+        query: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+    ) -> Any:
+        query = query if query else self.query
+        headers = headers if headers else self.headers
+        if action.upper() != "GET":
+            return self._perform_api_request(
+                url=url, action=action, query=query, headers=headers
+            )
+        key = self._request_key(url=url, action=action, query=query)
+        led = []
+
+        def fetch():
+            led.append(True)
+            # every caller falls back to the snapshot with its own budget
+            return self._perform_api_request(
+                url=url,
+                action=action,
+                query=query,
+                headers=headers,
+                serve_snapshot=False,
+            )
+
+        remaining = self._remaining_budget()
+        try:
+            return self.coalescer.run(
+                key=key,
+                fetch=fetch,
+                timeout=max(remaining, 0) if remaining is not None else None,
+            )
+        except RequestError as error:
+            remaining = self._remaining_budget()
+            if (
+                not led
+                and isinstance(error, DeadlineExceeded)
+                and (remaining is None or remaining > 0)
+            ):
+                # the leader ran out of its budget, but this caller has some left
+                return self._perform_api_request(
+                    url=url, action=action, query=query, headers=headers
+                )
+            return self._serve_snapshot(key=key, error=error)
+
+    async def send_api_request_async(
+        self,
+        url: str,
+        action: str,
+        query: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+    ) -> Any:
+        """Send a request from asyncio code without blocking the event loop.
+
+        Identical GET requests issued by tasks of the same event loop share a
+        single call, which runs in the default executor.
+        """
+        loop = asyncio.get_running_loop()
+
+        def fetch():
+            return loop.run_in_executor(
+                None, self._send_api_request, url, action, query, headers
+            )
+
+        if action.upper() != "GET":
+            return await fetch()
+        key = self._request_key(
+            url=url, action=action, query=query if query else self.query
+        )
+        return await self.coalescer.run_async(key=key, fetch=fetch)
+
+    def _perform_api_request(
+        self,
+        url: str,
+        action: str,
+        query: Dict,
+        headers: Dict,
+        serve_snapshot: bool = True,
+    ) -> Any:
+        request_config = self.request_config
+        idempotent = action.upper() == "GET"
+        key = self._request_key(url=url, action=action, query=query)
+        max_attempts = 1 + (request_config.max_retries if idempotent else 0)
+
+        error = None
+        for attempt in range(max_attempts):
+            if attempt:
+                delay = self._backoff_delay(attempt - 1)
+                remaining = self._remaining_budget()
+                if remaining is not None and remaining <= delay:
+                    error = DeadlineExceeded(
+                        f"{action} {url}: out of budget after {error}"
+                    )
+                    break
+                time.sleep(delay)
+            timeout = request_config.request_timeout
+            remaining = self._remaining_budget()
+            if remaining is not None:
+                if remaining <= 0:
+                    error = DeadlineExceeded(f"{action} {url}: out of budget")
+                    break
+                timeout = min(timeout, remaining)
+            if not self.circuit_breaker.allow_request():
+                error = CircuitOpenError(f"{action} {url}: circuit is open")
+                break
+            try:
+                response = self.transport.send(
+                    action, url, params=query, headers=headers, timeout=timeout
+                )
+            except requests.RequestException as exc:
+                self.circuit_breaker.record_failure()
+                error = RequestError(f"{action} {url}: {exc}")
+                continue
+            except BaseException:
+                # the API was not reached, so the request says nothing about it
+                self.circuit_breaker.release_probe()
+                raise
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                self.circuit_breaker.record_failure()
+                error = RequestError(f"{action} {url}: status {response.status_code}")
+                continue
+            if response.status_code < 400:
+                try:
+                    response_json = json.loads(response.text)
+                except ValueError:
+                    # an html error page of a proxy or gateway, not the API
+                    self.circuit_breaker.record_failure()
+                    error = RequestError(f"{action} {url}: response is not json")
+                    continue
+            # the API answered, so the outage (if any) is over
+            self.circuit_breaker.record_success()
+            if response.status_code >= 400:
+                raise RequestError(
+                    f"{action} {url}: status {response.status_code}: {response.text}"
+                )
+            if idempotent:
+                # keep the text, so callers never share the snapshot object
+                self._store_snapshot(key, response.text)
+            return response_json
+
+        if error is None:
+            error = DeadlineExceeded(f"{action} {url}: out of budget")
+        if not idempotent or not serve_snapshot:
+            raise error
+        return self._serve_snapshot(key=key, error=error)
+
+    def _run_status_command(self, description: str, build_summary) -> str:
+        """Build a status summary within the configured deadline budget."""
+        status_deadline = self.request_config.status_deadline
+        with self.request_deadline(status_deadline):
+            try:
+                summary = build_summary()
+            except RequestError as exc:
+                return f"Unable to get {description}: {exc}\n"
+            if self.is_degraded():
+                summary = (
+                    f"Note: {self.name} is unreachable, the status below is built "
+                    "from the last successful response.\n" + summary
+                )
+        return summary
+
+    def create_time_context(self) -> TimeContext:
+        return TimeContext.create(self.idle_threshold, now=self.clock())
+
+    def load_cards(self, card_jsons: List[Dict]) -> Tuple[List[Any], List[str]]:
+        """Parse cards and fetch their checklists.
+
+        Returns:
+            Tuple[List[Any], List[str]]: The cards with their checklists and the
+                ids of the cards whose checklists could not be fetched.
+        """
+        cards = []
+        failed_card_ids = []
+        parsed_cards = [self.parse_card(card_json) for card_json in card_jsons]
+        checklists = self.fetch_checklists([card.id for card in parsed_cards])
+        for card in parsed_cards:
+            if card.id not in checklists:
+                failed_card_ids.append(card.id)
+                continue
+            card.checklists = checklists[card.id]
+            cards.append(card)
+        return cards, failed_card_ids
+
+    def complete_cards(self, cards: List[Any]):
+        self.bulk_update([self.complete_card_update(card) for card in cards])
+
+    def _summarize_cards(self, cards: List[Any], update_cards: bool = True) -> str:
+        classified = self.classify_cards(cards, self.create_time_context())
+        summary = self.render_report(classified, update_cards=update_cards)
+        if update_cards:
+            self.complete_cards(classified[self.complete_status])
+        return summary
+
+    def get_doing_tasks_status(self) -> str:
+        summary = self._run_status_command(
+            description="doing tasks status", build_summary=self._get_doing_tasks_status
+        )
+        print(summary)
+        return summary
+
+    def _get_doing_tasks_status(self) -> str:
+        cards, failed_card_ids = self.load_cards(
+            self.list_cards(self.get_doing_list_id())
+        )
+        summary = self._summarize_cards(cards)
+        summary += self._render_card_ids(
+            "Cards Whose Checklists Could Not Be Fetched", failed_card_ids
+        )
+        return summary
+
+    def get_doing_tasks_status_changes(self) -> str:
+        """Report only what changed on the doing list since the last check."""
+        summary = self._run_status_command(
+            description="doing tasks status changes",
+            build_summary=self._get_doing_tasks_status_changes,
+        )
+        print(summary)
+        return summary
+
+    def _get_doing_tasks_status_changes(self) -> str:
+        card_jsons = self.list_cards(self.get_doing_list_id())
+
+        content_hashes = {}
+        unchanged_cards = {}
+        changed_card_jsons = []
+        for card_json in card_jsons:
+            card_id = card_json["id"]
+            content_hashes[card_id] = hashlib.sha1(
+                json.dumps(card_json, sort_keys=True).encode("utf-8")
+            ).hexdigest()
+            card_state = self.card_states.get(card_id)
+            if card_state and card_state.content_hash == content_hashes[card_id]:
+                # untouched card, its checklists can not have changed either
+                unchanged_cards[card_id] = card_state.card
+            else:
+                changed_card_jsons.append(card_json)
+        loaded_cards, failed_card_ids = self.load_cards(changed_card_jsons)
+        changed_cards = {card.id: card for card in loaded_cards}
+        cards = [
+            unchanged_cards.get(card_json["id"]) or changed_cards[card_json["id"]]
+            for card_json in card_jsons
+            if card_json["id"] not in failed_card_ids
+        ]
+
+        # overdue and idle depend on the time, so every card is classified again
+        classified = self.classify_cards(cards, self.create_time_context())
+        card_statuses = {card.id: set() for card in cards}
+        for status, status_cards in classified.items():
+            for card in status_cards:
+                card_statuses[card.id].add(status)
+
+        transitions = {status: [] for status in classified}
+        resolved_cards = []
+        card_states = {}
+        for card in cards:
+            statuses = frozenset(card_statuses[card.id])
+            issues = frozenset(card.issues)
+            card_state = self.card_states.get(card.id)
+            previous_statuses = card_state.statuses if card_state else frozenset()
+            for status in statuses - previous_statuses:
+                transitions[status].append(card)
+            if card_state and card_state.issues - issues:
+                resolved_cards.append((card, card_state.issues - issues))
+            card_states[card.id] = CardState(
+                content_hash=content_hashes[card.id],
+                card=card,
+                statuses=statuses,
+                issues=issues,
+            )
+        # a card without its checklists keeps its previous state, whose hash no
+        # longer matches, so its checklists are fetched again on the next check
+        for card_id in failed_card_ids:
+            if card_id in self.card_states:
+                card_states[card_id] = self.card_states[card_id]
+
+        summary = self.render_changes(transitions, resolved_cards)
+        summary += self._render_card_ids(
+            "Cards Whose Checklists Could Not Be Fetched", failed_card_ids
+        )
+        self.complete_cards(transitions[self.complete_status])
+        # only remember the states once the completed cards are moved to done,
+        # otherwise a failed update is never retried
+        self.card_states = card_states
+        if not summary:
+            summary = "No changes since the last status check.\n"
+        return summary
+
+    def get_cards_status(self, card_ids: Any) -> str:
+        """Classify only the given cards instead of the whole Doing list.
+
+        Args:
+            card_ids (Any): A list or a comma separated string of card
+                references, see parse_card_reference.
+        """
+        if isinstance(card_ids, str):
+            card_ids = card_ids.split(",")
+        card_ids = [self.parse_card_reference(card_id) for card_id in card_ids]
+        card_ids = [card_id for card_id in card_ids if card_id]
+        summary = self._run_status_command(
+            description="cards status",
+            build_summary=lambda: self._get_cards_status(card_ids),
+        )
+        print(summary)
+        return summary
+
+    def _get_cards_status(self, card_ids: List[str]) -> str:
+        cards, missing_card_ids = self.get_cards_with_checklists(card_ids)
+        # refreshing the status of cards is read only, completed cards are
+        # reported but only get_doing_tasks_status moves them to done
+        summary = self._summarize_cards(cards, update_cards=False)
+        summary += self._render_card_ids(
+            "Cards That Could Not Be Found", missing_card_ids
+        )
+        return summary
+
+    def _render_card_ids(self, title: str, card_ids: List[str]) -> str:
+        summary = ""
+        if card_ids:
+            summary += f"- {title}:\n"
+            for card_id in card_ids:
+                summary += f"\t• {card_id}\n"
+        return summary
+
+    def get_card_status(self, card_id: str) -> str:
+        """Classify a single card given its reference."""
+        return self.get_cards_status([card_id])
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+
+@dataclass
+class PMCommand:
+    label: str
+    name: str
+    arguments: Dict[str, str]
+    # called with the command arguments, unset until bound to a backend
+    function: Optional[Callable[..., str]] = None
+
+    def bind(self, function: Callable[..., str]) -> "PMCommand":
+        return PMCommand(
+            label=self.label,
+            name=self.name,
+            arguments=self.arguments,
+            function=function,
+        )
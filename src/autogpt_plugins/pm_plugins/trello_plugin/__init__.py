@@ -0,0 +1,71 @@
+"""The Trello backend of the Auto-GPT PM plugin
+
+Only what is needed to register the backend lives here, the client itself is
+imported from trello_plugin.py the first time a command runs.
+"""
+
+import os
+
+from ..pm_command import PMCommand
+
+TRELLO_COMMANDS = [
+    PMCommand(
+        label="Get Doing Tasks Status",
+        name="get_doing_tasks_status",
+        arguments={},
+    ),
+    PMCommand(
+        label="Get Doing Tasks Status Changes",
+        name="get_doing_tasks_status_changes",
+        arguments={},
+    ),
+    PMCommand(
+        label="Get Card Status",
+        name="get_card_status",
+        arguments={"card_id": "<card_id_or_url>"},
+    ),
+    PMCommand(
+        label="Get Cards Status",
+        name="get_cards_status",
+        arguments={"card_ids": "<comma_separated_card_ids_or_urls>"},
+    ),
+    PMCommand(
+        label="Analyze Trello Export File",
+        name="analyze_export_file",
+        arguments={"export_file": "<path_to_board_export_json>"},
+    ),
+]
+
+
+def trello_api_key_set() -> bool:
+    return (
+        True if os.getenv("TRELLO_API_KEY") and os.getenv("TRELLO_API_TOKEN") else False
+    )
+
+
+def trello_config_file_exists() -> bool:
+    return os.getenv("TRELLO_CONFIG_FILE") and os.path.exists(
+        os.getenv("TRELLO_CONFIG_FILE")
+    )
+
+
+def trello_configured() -> bool:
+    return bool(trello_config_file_exists() and trello_api_key_set())
+
+
+def create_trello_backend():
+    from .trello_plugin import Trello
+
+    # connected by its setup, within the request deadline
+    return Trello(connect=False)
+
+
+def analyze_export_file(export_file: str) -> str:
+    """Analyze a board export without the API, from the config file alone."""
+    from .trello_plugin import Trello
+
+    return Trello(connect=False).analyze_export_file(export_file)
+
+
+# commands that only need the config file, they run without the API keys
+TRELLO_OFFLINE_COMMANDS = {"analyze_export_file": analyze_export_file}
@@ -1,14 +1,31 @@
 import copy
 import json
 import os
-import requests
 import yaml
 
-from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
 from dateutil import parser
 from enum import Enum
-from typing import Optional, Any, Dict, List, Tuple
+from typing import Optional, Callable, Dict, List, Tuple
+
+from . import trello_api_key_set, trello_config_file_exists
+from ..pm_backend import (
+    CardUpdate,
+    HTTPTransport,
+    PMBackend,
+    RequestConfig,
+    TimeContext,
+    to_timestamp,
+)
+
+# maximum number of urls accepted by a single call to the batch endpoint
+TRELLO_BATCH_LIMIT = 10
+# number of cards parsed and classified by one worker task of an export analysis
+EXPORT_SHARD_SIZE = 500
+# checklist items rendered per checklist, the others are only counted
+MAX_CHECKLIST_ITEMS = 10
 
 
 class CheckListItemStatus(Enum):
@@ -51,12 +68,13 @@ class TrelloCheckListItem:
         self.status = CheckListItemStatus(item_json["state"])
         due = item_json["due"]
         self.due_date = parser.parse(due) if due else None
+        self.due_timestamp = to_timestamp(self.due_date)
 
     def __str__(self):
         return f"\t\t• {self.name}:\n\t\t\tstate: {self.status.value}\n\t\t\tdue date: {self.due_date}\n"
 
     def is_complete(self):
-        return self.status == CheckListItemStatus.COMPLETE.value
+        return self.status == CheckListItemStatus.COMPLETE
 
 
 @dataclass
@@ -64,20 +82,63 @@ class TrelloCheckList:
     id: str
     name: str
     checklist_items: List[TrelloCheckListItem] = None
+    # counted once when the checklist is created
+    complete_count: int = field(default=0, init=False)
+    incomplete_count: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        for item in self.checklist_items or []:
+            if item.is_complete():
+                self.complete_count += 1
+            else:
+                self.incomplete_count += 1
 
     def is_complete(self):
-        if not self.checklist_items:
-            return False
-        list(filter(lambda item: item.is_complete(), self.checklist_items)) == len(
-            self.checklist_items
-        )
+        return self.complete_count > 0 and self.incomplete_count == 0
 
-    def __str__(self):
-        content = "\t" + self.name + "\n"
-        for item in self.checklist_items:
-            content += str(item)
+    def render(
+        self,
+        time_context: Optional[TimeContext] = None,
+        max_items: int = MAX_CHECKLIST_ITEMS,
+    ) -> str:
+        """Render the checklist aggregates and at most max_items items.
+
+        A single pass over the items finds the earliest overdue and the next
+        due incomplete items while only the rendered items are formatted.
+        """
+        if not time_context:
+            time_context = TimeContext.create(idle_threshold=0)
+        earliest_overdue = None
+        next_due = None
+        rendered_items = []
+        for item in self.checklist_items or []:
+            if len(rendered_items) < max_items:
+                rendered_items.append(str(item))
+            if item.due_timestamp is None or item.is_complete():
+                continue
+            if item.due_timestamp < time_context.now:
+                if (
+                    not earliest_overdue
+                    or item.due_timestamp < earliest_overdue.due_timestamp
+                ):
+                    earliest_overdue = item
+            elif not next_due or item.due_timestamp < next_due.due_timestamp:
+                next_due = item
+
+        total = self.complete_count + self.incomplete_count
+        content = f"\t{self.name} ({self.complete_count}/{total} complete)\n"
+        if earliest_overdue:
+            content += f"\t\tearliest overdue: {earliest_overdue.name} (due {earliest_overdue.due_date})\n"
+        if next_due:
+            content += f"\t\tnext due: {next_due.name} (due {next_due.due_date})\n"
+        content += "".join(rendered_items)
+        if total > len(rendered_items):
+            content += f"\t\t… and {total - len(rendered_items)} more items\n"
         return content
 
+    def __str__(self):
+        return self.render()
+
 
 class TrelloCard:
     def __init__(self, card_json, trello_config):
@@ -96,6 +157,10 @@ class TrelloCard:
             if card_json["dateLastActivity"]
             else None
         )
+        self.due_timestamp = to_timestamp(self.due_date)
+        self.last_activity_timestamp = to_timestamp(self.last_activity_date)
+        # time context of the last classification, reused when rendering
+        self.time_context = None
         self.issues = []
         self.close_summary = None
         self.prefix = None
@@ -104,23 +169,23 @@ class TrelloCard:
     def is_complete(self):
         if not self.checklists:
             return False
-        return list(filter(lambda list: list.is_complete(), self.checklists)) == len(
-            self.checklists
-        )
+        return all(checklist.is_complete() for checklist in self.checklists)
 
-    def is_overdue(self):
-        if self.due_date:
-            now = datetime.now(timezone.utc)
-            return now > self.due_date
+    def is_overdue(self, time_context: Optional[TimeContext] = None):
+        if self.due_timestamp is not None:
+            if not time_context:
+                time_context = TimeContext.create(self.trello_config.idle_threshold)
+            return time_context.now > self.due_timestamp
         return False
 
-    def is_idle(self):
-        if self.last_activity_date:
-            now = datetime.now(timezone.utc)
-            idle_threshold = self.trello_config.idle_threshold
-            idle_day = idle_threshold // (24 * 60)
-            idle_second = (idle_threshold - idle_day * 24 * 60) * 60
-            return now > timedelta(idle_day, idle_second) + self.last_activity_date
+    def is_idle(self, time_context: Optional[TimeContext] = None):
+        if self.last_activity_timestamp is not None:
+            if not time_context:
+                time_context = TimeContext.create(self.trello_config.idle_threshold)
+            return (
+                time_context.now
+                > self.last_activity_timestamp + time_context.idle_threshold
+            )
         return False
 
     def get_issues(self) -> List[TrelloCardIssue]:
@@ -134,13 +199,18 @@ class TrelloCard:
         self.issues = issues
         return issues
 
-    def get_status(self, trello_config) -> TrelloCardStatus:
+    def get_status(
+        self, trello_config, time_context: Optional[TimeContext] = None
+    ) -> TrelloCardStatus:
         if self.checklists:
+            if not time_context:
+                time_context = TimeContext.create(trello_config.idle_threshold)
+            self.time_context = time_context
             if self.is_complete():
                 return TrelloCardStatus.CHECKLIST_ALL_COMPLETE
-            elif self.is_idle():
+            elif self.is_idle(time_context):
                 return TrelloCardStatus.IDLE
-            elif self.is_overdue():
+            elif self.is_overdue(time_context):
                 return TrelloCardStatus.OVERDUE
             elif self.checklists and not self.is_complete():
                 return TrelloCardStatus.CHECKLIST_IN_PROGRESS
@@ -160,7 +230,7 @@ class TrelloCard:
                 content += "\t\t• " + issue.value + "\n"
         if self.checklists:
             for checklist in self.checklists:
-                content += str(checklist)
+                content += checklist.render(self.time_context)
         if self.close_summary:
             content += "\tClose Summary:\n" + self.close_summary
         return content
@@ -185,6 +255,7 @@ class TrelloConfig:
         self.user_name = config["user_name"]
         self.board = TrelloBoard(name=config["board_name"])
         self.idle_threshold = config["idle_threshold"]
+        self.request_config = RequestConfig.from_config(config.get("request"))
         self.board_lists = {}
         for board_list in config["board_lists"]:
             board_list = TrelloList(name=board_list["name"], tag=board_list["tag"])
@@ -198,21 +269,97 @@ class TrelloConfig:
                 self.done_list = board_list
 
 
-def trello_api_key_set() -> bool:
-    return (
-        True if os.getenv("TRELLO_API_KEY") and os.getenv("TRELLO_API_TOKEN") else False
-    )
-
-
-def trello_config_file_exists() -> bool:
-    return os.getenv("TRELLO_CONFIG_FILE") and os.path.exists(
-        os.getenv("TRELLO_CONFIG_FILE")
-    )
-
-
-class Trello:
-    def __init__(self):
+# order in which the classified cards appear in a status report
+REPORT_STATUSES = [
+    TrelloCardStatus.CHECKLIST_ALL_COMPLETE,
+    TrelloCardStatus.CHECKLIST_IN_PROGRESS,
+    TrelloCardStatus.OVERDUE,
+    TrelloCardStatus.WITH_ISSUE,
+    TrelloCardStatus.IDLE,
+]
+
+
+def parse_checklists(checklists_json: Optional[List[Dict]]) -> List[TrelloCheckList]:
+    if not checklists_json:
+        return []
+    checklists = []
+    for checklist_json in checklists_json:
+        checklist_id = checklist_json["id"]
+        checklist_name = checklist_json["name"]
+        checklist_items = []
+        for item_json in checklist_json["checkItems"]:
+            checklist_item = TrelloCheckListItem(item_json=item_json)
+            checklist_items.append(checklist_item)
+        checklists.append(
+            TrelloCheckList(
+                id=checklist_id,
+                name=checklist_name,
+                checklist_items=checklist_items,
+            )
+        )
+    return checklists
+
+
+def classify_cards(
+    trello_cards: List[TrelloCard],
+    trello_config: TrelloConfig,
+    time_context: Optional[TimeContext] = None,
+) -> Dict[TrelloCardStatus, List[TrelloCard]]:
+    """Group cards by the report section they belong to."""
+    if not time_context:
+        time_context = TimeContext.create(trello_config.idle_threshold)
+    classified = {status: [] for status in REPORT_STATUSES}
+    for trello_card in trello_cards:
+        trello_card_status = trello_card.get_status(
+            trello_config=trello_config, time_context=time_context
+        )
+        if trello_card_status == TrelloCardStatus.CHECKLIST_ALL_COMPLETE:
+            classified[TrelloCardStatus.CHECKLIST_ALL_COMPLETE].append(trello_card)
+        elif trello_card_status == TrelloCardStatus.CHECKLIST_IN_PROGRESS:
+            classified[TrelloCardStatus.CHECKLIST_IN_PROGRESS].append(trello_card)
+
+        issues = trello_card.get_issues()
+        if issues:
+            classified[TrelloCardStatus.WITH_ISSUE].append(trello_card)
+        elif trello_card_status == TrelloCardStatus.OVERDUE:
+            classified[TrelloCardStatus.OVERDUE].append(trello_card)
+        elif trello_card_status == TrelloCardStatus.IDLE:
+            classified[TrelloCardStatus.IDLE].append(trello_card)
+    return classified
+
+
+def classify_card_shard(
+    card_jsons: List[Dict],
+    trello_config: TrelloConfig,
+    time_context: TimeContext,
+) -> Dict[TrelloCardStatus, List[TrelloCard]]:
+    """Parse and classify a shard of cards, runs inside a worker process."""
+    trello_cards = []
+    for card_json in card_jsons:
+        trello_card = TrelloCard(card_json=card_json, trello_config=trello_config)
+        trello_card.checklists = parse_checklists(card_json.get("checklists"))
+        trello_cards.append(trello_card)
+    return classify_cards(trello_cards, trello_config, time_context)
+
+
+class Trello(PMBackend):
+    name = "Trello"
+    batch_limit = TRELLO_BATCH_LIMIT
+    complete_status = TrelloCardStatus.CHECKLIST_ALL_COMPLETE
+
+    def __init__(
+        self,
+        transport: Optional[HTTPTransport] = None,
+        clock: Optional[Callable[[], datetime]] = None,
+        connect: bool = True,
+    ):
         self.read_trello_configuration()
+        super().__init__(
+            request_config=self.trello_config.request_config,
+            idle_threshold=self.trello_config.idle_threshold,
+            transport=transport,
+            clock=clock,
+        )
         api_key = (os.getenv("TRELLO_API_KEY"),)
         api_token = os.getenv("TRELLO_API_TOKEN")
         self.url = "https://api.trello.com/1"
@@ -221,7 +368,14 @@ class Trello:
             "token": api_token,
         }
         self.headers = {"Accept": "application/json"}
-
+        self.trello_users = {}
+        # without connecting, only the commands working from the configuration
+        # alone, like analyze_export_file, can be used
+        if connect:
+            self.connect()
+
+    def connect(self):
+        """Look up the ids of the board and its lists, and the board members."""
         get_boards_url = f"{self.url}/members/{self.trello_config.user_name}/boards"
         response_json = self._send_api_request(action="GET", url=get_boards_url)
         for board_json in response_json:
@@ -242,7 +396,6 @@ class Trello:
                         self.trello_config.done_list.id = id
                 # process all the board members
                 trello_users = self.get_board_members(board_id=board_id)
-                self.trello_users = {}
                 for trello_user in trello_users:
                     self.trello_users[trello_user.id] = trello_user
                 break
@@ -257,32 +410,13 @@ class Trello:
 
         self.trello_config = TrelloConfig(config)
 
-    def _send_api_request(
-        self,
-        url: str,
-        action: str,
-        query: Optional[Dict] = None,
-        headers: Optional[Dict] = None,
-    ) -> Any:
-        response = requests.request(
-            action,
-            url,
-            params=query if query else self.query,
-            headers=headers if headers else self.headers,
-        )
-        # if url.find("members") >= 0:
-        # print(response.text, "\n\n")
-        response_json = json.loads(response.text)
-        return response_json
-
     def get_cards(self, board_id: str, filter: str = "all"):
         url = f"{self.url}/boards/{board_id}/cards/{filter}"
-        response = requests.request("GET", url, params=self.query, headers=self.headers)
+        return self._send_api_request(action="GET", url=url)
 
     def get_board_lists(self, board_id: str, filter: str = "all") -> List[TrelloList]:
         url = f"{self.url}/boards/{board_id}/lists/{filter}"
-        response = requests.request("GET", url, params=self.query, headers=self.headers)
-        response_json = json.loads(response.text)
+        response_json = self._send_api_request(action="GET", url=url)
         trello_lists = []
         for list in response_json:
             trello_list = TrelloList(id=list["id"], name=list["name"])
@@ -303,23 +437,75 @@ class Trello:
     def get_checklists(self, card_id: str) -> List[TrelloCheckList]:
         url = f"{self.url}/cards/{card_id}/checklists"
         response_json = self._send_api_request(action="GET", url=url)
-        if not response_json:
-            return []
-        checklists = []
-        for checklist_json in response_json:
-            checklist_id = checklist_json["id"]
-            checklist_name = checklist_json["name"]
-            checklist_items = []
-            for item_json in checklist_json["checkItems"]:
-                checklist_item = TrelloCheckListItem(item_json=item_json)
-                checklist_items.append(checklist_item)
-            checklists.append(
-                TrelloCheckList(
-                    id=checklist_id,
-                    name=checklist_name,
-                    checklist_items=checklist_items,
-                )
+        return parse_checklists(response_json)
+
+    def fetch_card_checklists(self, card_id: str) -> List[TrelloCheckList]:
+        return self.get_checklists(card_id)
+
+    def get_doing_list_id(self) -> str:
+        return self.trello_config.doing_list.id
+
+    def list_cards(self, list_id: str) -> List[Dict]:
+        url = f"{self.url}/lists/{list_id}/cards"
+        return self._send_api_request(url=url, action="GET")
+
+    def parse_card(self, card_json: Dict) -> TrelloCard:
+        return TrelloCard(card_json=card_json, trello_config=self.trello_config)
+
+    def parse_card_reference(self, card_reference: str) -> str:
+        """Turn a card id, short link or card url into an id the API accepts."""
+        card_reference = card_reference.strip()
+        # card urls look like https://trello.com/c/{shortLink}/{idShort}-{name}
+        if "/c/" in card_reference:
+            return card_reference.split("/c/", 1)[1].split("/", 1)[0]
+        return card_reference
+
+    def get_cards_with_checklists(
+        self, card_ids: List[str]
+    ) -> Tuple[List[TrelloCard], List[str]]:
+        """Fetch cards and their checklists through the batch endpoint.
+
+        Returns:
+            Tuple[List[TrelloCard], List[str]]: The cards found and the ids of
+                the cards that could not be fetched.
+        """
+        trello_cards = []
+        missing_card_ids = []
+        url = f"{self.url}/batch"
+        for batch_card_ids in self.batched(card_ids):
+            query = copy.deepcopy(self.query)
+            query["urls"] = ",".join(
+                f"/cards/{card_id}?checklists=all" for card_id in batch_card_ids
+            )
+            response_json = self._send_api_request(action="GET", url=url, query=query)
+            for card_id, card_response in zip(batch_card_ids, response_json):
+                card_json = card_response.get("200")
+                if not card_json:
+                    missing_card_ids.append(card_id)
+                    continue
+                trello_card = self.parse_card(card_json)
+                trello_card.checklists = parse_checklists(card_json.get("checklists"))
+                trello_cards.append(trello_card)
+        return trello_cards, missing_card_ids
+
+    def fetch_checklists(self, card_ids: List[str]) -> Dict[str, List[TrelloCheckList]]:
+        """Fetch the checklists of several cards through the batch endpoint.
+
+        A card whose entry in the batch response is not a success, for example
+        a 429 or a 404, is left out like a failed request.
+        """
+        checklists = {}
+        url = f"{self.url}/batch"
+        for batch_card_ids in self.batched(card_ids):
+            query = copy.deepcopy(self.query)
+            query["urls"] = ",".join(
+                f"/cards/{card_id}/checklists" for card_id in batch_card_ids
             )
+            response_json = self._send_api_request(action="GET", url=url, query=query)
+            for card_id, checklists_response in zip(batch_card_ids, response_json):
+                if "200" not in checklists_response:
+                    continue
+                checklists[card_id] = parse_checklists(checklists_response["200"])
         return checklists
 
     def add_card_comment(self, card_id: str, comment: str):
@@ -340,42 +526,81 @@ class Trello:
         query["idList"] = new_list_id
         self._send_api_request(action="PUT", url=url, query=query)
 
+    def update_card(self, update: CardUpdate):
+        if update.complete or update.list_id:
+            # completing and moving the card share a single request
+            url = f"{self.url}/cards/{update.card_id}"
+            query = copy.deepcopy(self.query)
+            if update.complete:
+                query["dueComplete"] = "true"
+            if update.list_id:
+                query["idList"] = update.list_id
+            self._send_api_request(action="PUT", url=url, query=query)
+        # commented last, so an update retried after a failed PUT does not
+        # comment twice
+        if update.comment:
+            self.add_card_comment(card_id=update.card_id, comment=update.comment)
+
+    def complete_card_update(self, trello_card: TrelloCard) -> CardUpdate:
+        return CardUpdate(
+            card_id=trello_card.id,
+            comment=self.generate_close_summary(
+                member_ids=trello_card.member_ids,
+                time_delta=trello_card.get_last_update_difference(),
+            ),
+            complete=True,
+            list_id=self.trello_config.done_list.id,
+        )
+
+    def classify_cards(
+        self, cards: List[TrelloCard], time_context: TimeContext
+    ) -> Dict[TrelloCardStatus, List[TrelloCard]]:
+        return classify_cards(cards, self.trello_config, time_context)
+
     def format_date_diff(self, diff: datetime):
         days = diff.days
         hours = diff.seconds // 3600
         return f"{days} days, {hours} hours"
 
     def generate_close_summary(
-        self, member_ids: List[str], time_delta: Optional[datetime]
+        self,
+        member_ids: List[str],
+        time_delta: Optional[datetime],
+        trello_users: Optional[Dict[str, TrelloUser]] = None,
     ) -> str:
+        trello_users = trello_users if trello_users is not None else self.trello_users
         comment = ""
         if member_ids:
             comment += "Team member(s) who worked on the card:\n"
             for member_id in member_ids:
-                comment += f"    {self.trello_users[member_id].full_name}\n"
+                if member_id in trello_users:
+                    comment += f"    {trello_users[member_id].full_name}\n"
         if time_delta:
             comment += f"It took {self.format_date_diff(time_delta)}.\n"
         comment += "        - Marked as done by AutoGPT"
         return comment
 
-    def _handle_all_complete_cards(self, trello_cards: List[TrelloCard]):
+    def _handle_all_complete_cards(
+        self,
+        trello_cards: List[TrelloCard],
+        update_cards: bool = True,
+        trello_users: Optional[Dict[str, TrelloUser]] = None,
+    ):
         summary = ""
         if trello_cards:
-            summary += f"- Completed Tasks That Are Moved to {self.trello_config.done_list.name}:\n"
+            if update_cards:
+                summary += f"- Completed Tasks That Are Moved to {self.trello_config.done_list.name}:\n"
+            else:
+                summary += "- Completed Tasks:\n"
             for idx, trello_card in enumerate(trello_cards):
                 trello_card.prefix = f"Completed Task {(idx+1):>03}"
                 member_ids = trello_card.member_ids
                 diff = trello_card.get_last_update_difference()
                 comment = self.generate_close_summary(
-                    member_ids=member_ids, time_delta=diff
+                    member_ids=member_ids, time_delta=diff, trello_users=trello_users
                 )
                 trello_card.close_summary = comment
-                self.add_card_comment(card_id=card_id, comment=comment)
-                self.mark_card_as_complete(card_id=card_id)
-                self.move_card_to_new_list(
-                    card_id=card_id, new_list_id=self.trello_config.done_list.id
-                )
-            summary += str(trello_card)
+                summary += str(trello_card)
         return summary
 
     def _handle_overdue_cards(self, trello_cards: List[TrelloCard]):
@@ -414,46 +639,167 @@ class Trello:
                 summary += str(trello_card)
         return summary
 
-    def get_doing_tasks_status(self):
-        url = f"{self.url}/lists/{self.trello_config.doing_list.id}/cards"
-        response_json = self._send_api_request(url=url, action="GET")
-
-        all_complete_list = []
-        overdue_list = []
-        idle_list = []
-        with_issue_list = []
-        in_progress_list = []
-        for card_json in response_json:
-            trello_card = TrelloCard(
-                card_json=card_json, trello_config=self.trello_config
-            )
-            card_id = trello_card.id
-            checklists = self.get_checklists(card_id)
-            trello_card.checklists = checklists
-            trello_card_status = trello_card.get_status(
-                trello_config=self.trello_config
-            )
-            if trello_card_status == TrelloCardStatus.CHECKLIST_ALL_COMPLETE:
-                all_complete_list.append(trello_card)
-            elif trello_card_status == TrelloCardStatus.CHECKLIST_IN_PROGRESS:
-                in_progress_list.append(trello_card)
-
-            issues = trello_card.get_issues()
-            if issues:
-                with_issue_list.append(trello_card)
-            elif trello_card_status == TrelloCardStatus.OVERDUE:
-                overdue_list.append(trello_card)
-            elif trello_card_status == TrelloCardStatus.IDLE:
-                idle_list.append(trello_card)
+    def render_changes(
+        self,
+        transitions: Dict[TrelloCardStatus, List[TrelloCard]],
+        resolved_cards: List[Tuple[TrelloCard, frozenset]],
+    ) -> str:
         summary = ""
-        summary += self._handle_all_complete_cards(all_complete_list)
-        summary += self._handle_in_progress_cards(in_progress_list)
-        summary += self._handle_overdue_cards(overdue_list)
-        summary += self._handle_with_issue_cards(with_issue_list)
-        summary += self._handle_idle_cards(idle_list)
+        summary += self._handle_all_complete_cards(
+            transitions[TrelloCardStatus.CHECKLIST_ALL_COMPLETE]
+        )
+        summary += self._handle_changed_cards(
+            transitions[TrelloCardStatus.OVERDUE],
+            title="Newly Overdue Tasks",
+            prefix="Overdue Task",
+        )
+        summary += self._handle_changed_cards(
+            transitions[TrelloCardStatus.IDLE],
+            title="Tasks That Became Idle",
+            prefix="Idle Task",
+        )
+        summary += self._handle_changed_cards(
+            transitions[TrelloCardStatus.WITH_ISSUE],
+            title="Tasks That Need More Details",
+            prefix="With Issue Task",
+        )
+        summary += self._handle_resolved_issue_cards(resolved_cards)
+        return summary
+
+    def _handle_changed_cards(
+        self, trello_cards: List[TrelloCard], title: str, prefix: str
+    ):
+        summary = ""
+        if trello_cards:
+            summary += f"- {title}:\n"
+            for idx, trello_card in enumerate(trello_cards):
+                trello_card.prefix = f"{prefix} {(idx+1):>03}"
+                summary += str(trello_card)
+        return summary
+
+    def _handle_resolved_issue_cards(
+        self, resolved_cards: List[Tuple[TrelloCard, frozenset]]
+    ):
+        summary = ""
+        if resolved_cards:
+            summary += "- Tasks With Resolved Issues:\n"
+            for idx, (trello_card, issues) in enumerate(resolved_cards):
+                summary += f"Resolved Task {(idx+1):>03}: {trello_card.name}\n"
+                for issue in sorted(issues, key=list(TrelloCardIssue).index):
+                    summary += "\t\t• " + issue.value + "\n"
+        return summary
+
+    def render_report(
+        self,
+        classified: Dict[TrelloCardStatus, List[TrelloCard]],
+        update_cards: bool = True,
+        trello_users: Optional[Dict[str, TrelloUser]] = None,
+    ) -> str:
+        summary = ""
+        summary += self._handle_all_complete_cards(
+            classified[TrelloCardStatus.CHECKLIST_ALL_COMPLETE],
+            update_cards=update_cards,
+            trello_users=trello_users,
+        )
+        summary += self._handle_in_progress_cards(
+            classified[TrelloCardStatus.CHECKLIST_IN_PROGRESS]
+        )
+        summary += self._handle_overdue_cards(classified[TrelloCardStatus.OVERDUE])
+        summary += self._handle_with_issue_cards(
+            classified[TrelloCardStatus.WITH_ISSUE]
+        )
+        summary += self._handle_idle_cards(classified[TrelloCardStatus.IDLE])
+        return summary
+
+    def analyze_export_file(
+        self,
+        export_file: str,
+        processes: Optional[int] = None,
+        shard_size: int = EXPORT_SHARD_SIZE,
+    ) -> str:
+        """Build the doing tasks report from a Trello board JSON export.
+
+        The export is decoded once, then its open Doing cards are split into
+        shards that are parsed and classified across a pool of processes.
+        Nothing is written back to Trello.
+
+        Args:
+            export_file (str): The path of the board export.
+            processes (Optional[int]): The number of worker processes,
+                defaults to the number of CPUs.
+            shard_size (int): The number of cards handled by one worker task.
+
+        Returns:
+            str: The status report, or the reason the export could not be read.
+        """
+        try:
+            summary = self._analyze_export_file(
+                export_file, processes=processes, shard_size=shard_size
+            )
+        except (OSError, json.JSONDecodeError, KeyError) as exc:
+            summary = f"Unable to analyze export file {export_file}: {exc!r}\n"
         print(summary)
         return summary
 
+    def _analyze_export_file(
+        self, export_file: str, processes: Optional[int], shard_size: int
+    ) -> str:
+        with open(export_file, "rb") as stream:
+            export_json = json.load(stream)
+
+        doing_list_ids = {
+            list_json["id"]
+            for list_json in export_json.get("lists", [])
+            if list_json["name"] == self.trello_config.doing_list.name
+        }
+        checklists_by_card = {}
+        for checklist_json in export_json.get("checklists", []):
+            checklists_by_card.setdefault(checklist_json["idCard"], []).append(
+                checklist_json
+            )
+        card_jsons = []
+        for card_json in export_json.get("cards", []):
+            if card_json.get("closed") or card_json["idList"] not in doing_list_ids:
+                continue
+            card_json["checklists"] = checklists_by_card.get(card_json["id"], [])
+            card_jsons.append(card_json)
+        trello_users = {
+            user["id"]: TrelloUser(
+                id=user["id"], full_name=user["fullName"], user_name=user["username"]
+            )
+            for user in export_json.get("members", [])
+        }
+        del export_json, checklists_by_card
+
+        time_context = self.create_time_context()
+        shards = [
+            card_jsons[start : start + shard_size]
+            for start in range(0, len(card_jsons), shard_size)
+        ]
+        if len(shards) > 1:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                shard_results = list(
+                    executor.map(
+                        classify_card_shard,
+                        shards,
+                        [self.trello_config] * len(shards),
+                        [time_context] * len(shards),
+                    )
+                )
+        else:
+            shard_results = [
+                classify_card_shard(shard, self.trello_config, time_context)
+                for shard in shards
+            ]
+
+        classified = {status: [] for status in REPORT_STATUSES}
+        for shard_result in shard_results:
+            for status, trello_cards in shard_result.items():
+                classified[status].extend(trello_cards)
+        return self.render_report(
+            classified, update_cards=False, trello_users=trello_users
+        )
+
 
 board_id = "6457300c5e50939a3ef7d958"
 card_id = "6457301eb285c607736d4634"
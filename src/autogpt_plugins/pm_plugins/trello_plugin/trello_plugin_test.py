@@ -1,17 +1,34 @@
+import asyncio
+import gzip
 import http.client
 import json
 import os
 import requests
+import tempfile
+import threading
+import time
 import unittest
+from typing import Any
 from unittest.mock import patch
 from unittest.mock import mock_open
-from trello_plugin import (
+from datetime import datetime, timezone
+from ..pm_backend import (
+    CardUpdate,
+    CassetteMissError,
+    CassetteTransport,
+    CircuitState,
+    RequestError,
+    TimeContext,
+)
+from .trello_plugin import (
     Trello,
     TrelloCard,
+    TrelloCheckList,
+    TrelloCheckListItem,
     trello_api_key_set,
     trello_config_file_exists,
 )
-
+from . import analyze_export_file
 
 MOCK_HOST = "MOCK_HOST"
 MOCK_TRELLO_API_KEY = "test_trello_api_key"
@@ -37,15 +54,22 @@ def load_test_data_json(json_file: str):
 
 
 class MockResponse:
-    def __init__(self, test_data: str):
+    def __init__(self, test_data: str, status_code: int = 200):
 
         self.text = json.dumps(load_test_data_json(test_data))
+        self.status_code = status_code
 
     def text(self):
         print(self.text)
         return self.text
 
 
+class MockJSONResponse(MockResponse):
+    def __init__(self, json_data: Any, status_code: int = 200):
+        self.text = json.dumps(json_data)
+        self.status_code = status_code
+
+
 class TestTrelloPlugin(unittest.TestCase):
     @unittest.mock.patch.dict(
         os.environ,
@@ -106,16 +130,665 @@ class TestTrelloPlugin(unittest.TestCase):
         over_due_trello_card.checklists = self.trello.get_checklists(
             card_id=over_due_trello_card.id
         )
-        # check card status is overdue
+        # check card status is overdue, one day after its last activity
+        time_context = TimeContext.create(
+            self.trello.trello_config.idle_threshold,
+            now=datetime(2023, 5, 13, tzinfo=timezone.utc),
+        )
         self.assertFalse(over_due_trello_card.is_complete())
-        self.assertTrue(over_due_trello_card.is_overdue())
-        self.assertFalse(over_due_trello_card.is_idle())
+        self.assertTrue(over_due_trello_card.is_overdue(time_context))
+        self.assertFalse(over_due_trello_card.is_idle(time_context))
         # check card checklists
         self.assertEqual(len(over_due_trello_card.checklists), 2)
         # check card checklist items
         self.assertEqual(len(over_due_trello_card.checklists[0].checklist_items), 2)
         self.assertEqual(len(over_due_trello_card.checklists[1].checklist_items), 3)
 
+    @patch("time.sleep")
+    @patch("requests.request")
+    def test_request_retry(self, mock_request, mock_sleep):
+        # a transient error and a server error are retried for GET requests
+        mock_request.side_effect = [
+            requests.ConnectionError("connection reset"),
+            MockResponse("card_overdue_checklists.json", status_code=503),
+            MockResponse("card_overdue_checklists.json"),
+        ]
+        checklists = self.trello.get_checklists(card_id="card_id")
+        self.assertEqual(len(checklists), 2)
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(self.trello.circuit_breaker.state, CircuitState.CLOSED)
+
+    @patch("time.sleep")
+    @patch("requests.request")
+    def test_request_not_retried_for_updates(self, mock_request, mock_sleep):
+        mock_request.side_effect = [requests.ConnectionError("connection reset")]
+        with self.assertRaises(RequestError):
+            self.trello.mark_card_as_complete(card_id="card_id")
+        self.assertEqual(mock_request.call_count, 1)
+
+    @patch("time.sleep")
+    @patch("requests.request")
+    def test_request_snapshot_and_circuit_breaker(self, mock_request, mock_sleep):
+        request_config = self.trello.trello_config.request_config
+        request_config.max_retries = 0
+        self.trello.circuit_breaker.failure_threshold = 2
+        mock_request.side_effect = [MockResponse("card_overdue_checklists.json")]
+        self.trello.get_checklists(card_id="card_id")
+
+        # the last good response is served while the API is failing
+        mock_request.side_effect = requests.Timeout("timed out")
+        with self.trello.request_deadline(request_config.status_deadline):
+            checklists = self.trello.get_checklists(card_id="card_id")
+            self.assertTrue(self.trello.is_degraded())
+        self.assertEqual(len(checklists), 2)
+        self.trello.get_checklists(card_id="card_id")
+        self.assertEqual(self.trello.circuit_breaker.state, CircuitState.OPEN)
+
+        # once the circuit is open requests fail fast without hitting the API
+        mock_request.reset_mock()
+        self.trello.get_checklists(card_id="card_id")
+        mock_request.assert_not_called()
+        with self.assertRaises(RequestError):
+            self.trello.get_checklists(card_id="another_card_id")
+
+    @patch("requests.request")
+    def test_circuit_breaker_probe_released(self, mock_request):
+        circuit_breaker = self.trello.circuit_breaker
+        circuit_breaker.state = CircuitState.OPEN
+        circuit_breaker.opened_at = time.monotonic() - circuit_breaker.reset_timeout
+
+        # a request without budget left does not take the trial slot
+        with self.trello.request_deadline(0):
+            with self.assertRaises(RequestError):
+                self.trello.get_checklists(card_id="card_id")
+        self.assertEqual(circuit_breaker.state, CircuitState.OPEN)
+
+        # a probe failing before reaching the API gives the trial slot back
+        mock_request.side_effect = [ValueError("local error")]
+        with self.assertRaises(ValueError):
+            self.trello.get_checklists(card_id="card_id")
+        self.assertEqual(circuit_breaker.state, CircuitState.OPEN)
+
+        mock_request.side_effect = [MockResponse("card_overdue_checklists.json")]
+        checklists = self.trello.get_checklists(card_id="card_id")
+        self.assertEqual(len(checklists), 2)
+        self.assertEqual(circuit_breaker.state, CircuitState.CLOSED)
+
+    def test_circuit_breaker_stale_probe_expires(self):
+        circuit_breaker = self.trello.circuit_breaker
+        circuit_breaker.state = CircuitState.OPEN
+        circuit_breaker.opened_at = time.monotonic() - circuit_breaker.reset_timeout
+        self.assertTrue(circuit_breaker.allow_request())
+        self.assertFalse(circuit_breaker.allow_request())
+        # the probe never reported back, a new one is allowed after reset_timeout
+        circuit_breaker.probe_started_at -= circuit_breaker.reset_timeout
+        self.assertTrue(circuit_breaker.allow_request())
+
+    @patch("requests.request")
+    def test_request_deadline(self, mock_request):
+        with self.trello.request_deadline(0):
+            with self.assertRaises(RequestError):
+                self.trello.get_checklists(card_id="card_id")
+        mock_request.assert_not_called()
+
+    @patch("requests.request")
+    def test_get_cards_status(self, mock_request):
+        mock_request.side_effect = [MockResponse("batch_cards.json")]
+        summary = self.trello.get_cards_status(
+            "https://trello.com/c/O5NsWKAR/2-add-unit-tests, missing_card_id, "
+        )
+        # both cards are fetched with their checklists in a single batch call
+        self.assertEqual(mock_request.call_count, 1)
+        urls = mock_request.call_args.kwargs["params"]["urls"]
+        self.assertEqual(
+            urls,
+            "/cards/O5NsWKAR?checklists=all,/cards/missing_card_id?checklists=all",
+        )
+        self.assertIn("Add Unit Tests", summary)
+        self.assertIn("Cards That Could Not Be Found:\n\t• missing_card_id", summary)
+
+    @patch("requests.request")
+    def test_get_card_status_is_read_only(self, mock_request):
+        card_json = load_test_data_json("card_overdue.json")
+        checklists_json = load_test_data_json("card_overdue_checklists.json")
+        for checklist_json in checklists_json:
+            for item_json in checklist_json["checkItems"]:
+                item_json["state"] = "complete"
+        card_json["checklists"] = checklists_json
+        mock_request.side_effect = lambda *args, **kwargs: MockJSONResponse(
+            [{"200": card_json}]
+        )
+        for _ in range(2):
+            summary = self.trello.get_card_status(card_json["id"])
+            self.assertIn("- Completed Tasks:\nCompleted Task 001", summary)
+        # the card is only fetched, never commented on, completed or moved
+        actions = [call.args[0] for call in mock_request.call_args_list]
+        self.assertEqual(actions, ["GET", "GET"])
+
+    def test_parse_card_reference(self):
+        self.assertEqual(
+            self.trello.parse_card_reference("https://trello.com/c/O5NsWKAR"),
+            "O5NsWKAR",
+        )
+        self.assertEqual(
+            self.trello.parse_card_reference(" 64584a15da35faaabc7ad080 "),
+            "64584a15da35faaabc7ad080",
+        )
+
+    @patch("requests.request")
+    def test_coalesce_concurrent_requests(self, mock_request):
+        release = threading.Event()
+
+        def send_request(*args, **kwargs):
+            release.wait(timeout=5)
+            return MockResponse("card_overdue_checklists.json")
+
+        mock_request.side_effect = send_request
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(self.trello.get_checklists("card_id"))
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        # wait until the followers are queued behind the in-flight request
+        key = self.trello._request_key(
+            url=f"{self.trello.url}/cards/card_id/checklists",
+            action="GET",
+            query=self.trello.query,
+        )
+        for _ in range(500):
+            in_flight = self.trello.coalescer._in_flight.get(key)
+            if in_flight and in_flight.waiters == 4:
+                break
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(len(checklists) == 2 for checklists in results))
+
+    def wait_for_waiters(self, url: str, waiters: int):
+        key = self.trello._request_key(url=url, action="GET", query=self.trello.query)
+        for _ in range(500):
+            in_flight = self.trello.coalescer._in_flight.get(key)
+            if in_flight and in_flight.waiters == waiters:
+                return
+            time.sleep(0.01)
+
+    @patch("requests.request")
+    def test_coalesced_waiter_timeout_serves_snapshot(self, mock_request):
+        url = f"{self.trello.url}/cards/card_id/checklists"
+        mock_request.side_effect = [MockResponse("card_overdue_checklists.json")]
+        # the caller owns the returned object, the snapshot is unaffected
+        self.trello._send_api_request(url=url, action="GET").clear()
+
+        release = threading.Event()
+
+        def send_request(*args, **kwargs):
+            release.wait(timeout=5)
+            return MockResponse("card_overdue_checklists.json")
+
+        mock_request.side_effect = send_request
+        leader = threading.Thread(target=lambda: self.trello.get_checklists("card_id"))
+        leader.start()
+        self.wait_for_waiters(url, 0)
+        with self.trello.request_deadline(0.05):
+            checklists = self.trello.get_checklists(card_id="card_id")
+            self.assertTrue(self.trello.is_degraded())
+        release.set()
+        leader.join()
+        self.assertEqual(len(checklists), 2)
+
+    @patch("requests.request")
+    def test_coalesced_waiter_retries_after_leader_deadline(self, mock_request):
+        url = f"{self.trello.url}/cards/card_id/checklists"
+        release = threading.Event()
+
+        def send_request(*args, **kwargs):
+            if not release.is_set():
+                release.wait(timeout=5)
+                raise requests.ConnectionError("connection reset")
+            return MockResponse("card_overdue_checklists.json")
+
+        def lead():
+            with self.trello.request_deadline(0.1):
+                try:
+                    self.trello.get_checklists(card_id="card_id")
+                except RequestError as exc:
+                    leader_errors.append(exc)
+
+        mock_request.side_effect = send_request
+        leader_errors = []
+        waiter_results = []
+        leader = threading.Thread(target=lead)
+        waiter = threading.Thread(
+            target=lambda: waiter_results.append(
+                self.trello.get_checklists(card_id="card_id")
+            )
+        )
+        leader.start()
+        self.wait_for_waiters(url, 0)
+        waiter.start()
+        self.wait_for_waiters(url, 1)
+        time.sleep(0.15)
+        release.set()
+        leader.join()
+        waiter.join()
+        # the leader ran out of budget, the waiter had no deadline of its own
+        self.assertEqual(len(leader_errors), 1)
+        self.assertEqual(len(waiter_results[0]), 2)
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch("requests.request")
+    def test_coalesce_concurrent_async_requests(self, mock_request):
+        def send_request(*args, **kwargs):
+            time.sleep(0.05)
+            return MockResponse("card_overdue_checklists.json")
+
+        mock_request.side_effect = send_request
+        url = f"{self.trello.url}/cards/card_id/checklists"
+
+        async def send_requests():
+            return await asyncio.gather(
+                *[
+                    self.trello.send_api_request_async(url=url, action="GET")
+                    for _ in range(5)
+                ]
+            )
+
+        results = asyncio.run(send_requests())
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(results[0], results[4])
+        self.assertIsNot(results[0], results[4])
+
+    @patch("requests.request")
+    def test_analyze_export_file(self, mock_request):
+        export_json = {
+            "cards": load_test_data_json("get_cards.json"),
+            "checklists": load_test_data_json("get_checklists.json"),
+            "lists": load_test_data_json("lists.json"),
+            "members": load_test_data_json("members.json"),
+        }
+        with tempfile.TemporaryDirectory() as export_dir:
+            export_file = os.path.join(export_dir, "export.json")
+            with open(export_file, "w") as stream:
+                json.dump(export_json, stream)
+            # one card per shard so the cards are spread across the pool
+            summary = self.trello.analyze_export_file(
+                export_file, processes=2, shard_size=1
+            )
+            self.assertEqual(
+                summary,
+                self.trello.analyze_export_file(export_file, shard_size=10),
+            )
+        mock_request.assert_not_called()
+        self.assertIn("Add Unit Tests", summary)
+        self.assertIn("Get Trello API working", summary)
+
+    @patch("requests.request")
+    def test_analyze_export_file_offline(self, mock_request):
+        export_json = {
+            "cards": load_test_data_json("get_cards.json"),
+            "checklists": load_test_data_json("get_checklists.json"),
+            "lists": load_test_data_json("lists.json"),
+            "members": [],
+        }
+        with tempfile.TemporaryDirectory() as export_dir, patch.dict(
+            os.environ, {"TRELLO_CONFIG_FILE": get_mock_config_location()}
+        ):
+            os.environ.pop("TRELLO_API_KEY", None)
+            os.environ.pop("TRELLO_API_TOKEN", None)
+            export_file = os.path.join(export_dir, "export.json")
+            with open(export_file, "w") as stream:
+                json.dump(export_json, stream)
+            summary = analyze_export_file(export_file)
+        mock_request.assert_not_called()
+        self.assertIn("Add Unit Tests", summary)
+
+    def test_analyze_malformed_export_file(self):
+        with tempfile.TemporaryDirectory() as export_dir:
+            export_file = os.path.join(export_dir, "export.json")
+            self.assertTrue(
+                self.trello.analyze_export_file(export_file).startswith(
+                    f"Unable to analyze export file {export_file}: FileNotFoundError"
+                )
+            )
+            with open(export_file, "w") as stream:
+                stream.write('{"cards": [')
+            self.assertIn(
+                "JSONDecodeError", self.trello.analyze_export_file(export_file)
+            )
+            with open(export_file, "w") as stream:
+                json.dump({"lists": [{"id": "list_id"}]}, stream)
+            self.assertIn("KeyError", self.trello.analyze_export_file(export_file))
+
+    @unittest.mock.patch.dict(
+        os.environ,
+        {
+            "TRELLO_API_KEY": MOCK_TRELLO_API_KEY,
+            "TRELLO_API_TOKEN": MOCK_TRELLO_API_TOKEN,
+            "TRELLO_CONFIG_FILE": get_mock_config_location(),
+        },
+    )
+    @patch("time.sleep")
+    @patch("requests.request")
+    def test_cassette_record_and_replay(self, mock_request, mock_sleep):
+        with tempfile.TemporaryDirectory() as cassette_dir:
+            cassette_file = os.path.join(cassette_dir, "trello.json.gz")
+            mock_request.side_effect = [
+                MockResponse("boards.json"),
+                MockResponse("lists.json"),
+                MockResponse("members.json"),
+                MockResponse("get_checklists.json"),
+                MockResponse("card_overdue_checklists.json"),
+            ]
+            recorder = CassetteTransport(cassette_file, mode=CassetteTransport.RECORD)
+            trello = Trello(transport=recorder)
+            trello.get_checklists(card_id="card_id")
+            trello.get_checklists(card_id="overdue_card_id")
+            recorder.save()
+            with gzip.open(cassette_file, "rt") as stream:
+                self.assertNotIn(MOCK_TRELLO_API_TOKEN, stream.read())
+
+            # replay in a different order without touching the network
+            mock_request.reset_mock()
+            player = CassetteTransport(cassette_file, latency=0.25)
+            trello = Trello(transport=player)
+            overdue_checklists = trello.get_checklists(card_id="overdue_card_id")
+            checklists = trello.get_checklists(card_id="card_id")
+            mock_request.assert_not_called()
+            self.assertEqual(len(overdue_checklists), 2)
+            self.assertEqual(checklists[0].name, "Milestone One")
+            self.assertEqual(mock_sleep.call_count, 5)
+            mock_sleep.assert_called_with(0.25)
+            with self.assertRaises(CassetteMissError):
+                trello.get_checklists(card_id="unknown_card_id")
+
+    @unittest.mock.patch.dict(
+        os.environ,
+        {
+            "TRELLO_API_KEY": MOCK_TRELLO_API_KEY,
+            "TRELLO_API_TOKEN": MOCK_TRELLO_API_TOKEN,
+            "TRELLO_CONFIG_FILE": get_mock_config_location(),
+        },
+    )
+    @patch("time.sleep")
+    @patch("requests.request")
+    def test_setup_failure(self, mock_request, mock_sleep):
+        mock_request.side_effect = requests.ConnectionError("connection reset")
+        trello = Trello(connect=False)
+        mock_request.assert_not_called()
+        error = trello.setup()
+        self.assertTrue(error.startswith("Unable to connect to Trello: GET"))
+        self.assertEqual(mock_request.call_count, 1 + trello.request_config.max_retries)
+
+        mock_request.side_effect = [
+            MockResponse("boards.json"),
+            MockResponse("lists.json"),
+            MockResponse("members.json"),
+        ]
+        self.assertIsNone(trello.setup())
+        self.assertEqual(
+            trello.get_doing_list_id(), self.trello.trello_config.doing_list.id
+        )
+
+    @patch("time.sleep")
+    @patch("requests.request")
+    def test_cassette_replay_timeout(self, mock_request, mock_sleep):
+        url = "https://api.trello.com/1/cards/card_id/checklists"
+        with tempfile.TemporaryDirectory() as cassette_dir:
+            cassette_file = os.path.join(cassette_dir, "trello.json.gz")
+            mock_request.side_effect = [MockResponse("get_checklists.json")]
+            recorder = CassetteTransport(cassette_file, mode=CassetteTransport.RECORD)
+            recorder.send(action="GET", url=url, params={}, headers={}, timeout=1)
+            recorder.save()
+
+            player = CassetteTransport(cassette_file, latency=2)
+            with self.assertRaises(requests.Timeout):
+                player.send(action="GET", url=url, params={}, headers={}, timeout=1)
+            mock_sleep.assert_called_with(1)
+            with self.assertRaises(ValueError):
+                CassetteTransport(cassette_file, mode="playback")
+
+    @patch("requests.request")
+    def test_doing_tasks_status_changes(self, mock_request):
+        cards_json = load_test_data_json("get_cards.json")
+        checklists_json = load_test_data_json("get_checklists.json")
+        batch_json = [{"200": []}, {"200": checklists_json}]
+        mock_request.side_effect = [
+            MockJSONResponse(cards_json),
+            MockJSONResponse(batch_json),
+        ]
+        summary = self.trello.get_doing_tasks_status_changes()
+        self.assertIn("Tasks That Need More Details", summary)
+        self.assertIn("Add Unit Tests", summary)
+
+        # unchanged cards are neither fetched again nor reported
+        mock_request.side_effect = [MockJSONResponse(cards_json)]
+        summary = self.trello.get_doing_tasks_status_changes()
+        self.assertEqual(summary, "No changes since the last status check.\n")
+
+        # only the updated card is fetched again and only its change is reported
+        cards_json[0]["due"] = "2999-01-01T00:00:00.000Z"
+        cards_json[0]["dateLastActivity"] = "2999-01-01T00:00:00.000Z"
+        mock_request.side_effect = [
+            MockJSONResponse(cards_json),
+            MockJSONResponse([{"200": []}]),
+        ]
+        summary = self.trello.get_doing_tasks_status_changes()
+        urls = mock_request.call_args.kwargs["params"]["urls"]
+        self.assertEqual(urls, f"/cards/{cards_json[0]['id']}/checklists")
+        self.assertEqual(
+            summary,
+            "- Tasks With Resolved Issues:\n"
+            "Resolved Task 001: Add Unit Tests\n"
+            "\t\t• missing due date\n",
+        )
+
+    @patch("time.sleep")
+    @patch("requests.request")
+    def test_doing_tasks_status_transitions(self, mock_request, mock_sleep):
+        card_json = load_test_data_json("card_overdue.json")
+        checklists_json = load_test_data_json("card_overdue_checklists.json")
+        put_status_codes = []
+
+        def send_request(action, url, **kwargs):
+            if action == "PUT":
+                return MockJSONResponse({}, status_code=put_status_codes.pop(0))
+            if url.endswith("/batch"):
+                return MockJSONResponse([{"200": checklists_json}])
+            return MockJSONResponse([card_json])
+
+        mock_request.side_effect = send_request
+        # the card is due on 2023-05-10, last updated on 2023-05-12
+        self.trello.clock = lambda: datetime(2023, 5, 9, tzinfo=timezone.utc)
+        summary = self.trello.get_doing_tasks_status_changes()
+        self.assertEqual(summary, "No changes since the last status check.\n")
+
+        self.trello.clock = lambda: datetime(2023, 5, 11, tzinfo=timezone.utc)
+        summary = self.trello.get_doing_tasks_status_changes()
+        self.assertIn("- Newly Overdue Tasks:\nOverdue Task 001", summary)
+
+        for checklist_json in checklists_json:
+            for item_json in checklist_json["checkItems"]:
+                item_json["state"] = "complete"
+        card_json["dateLastActivity"] = "2023-05-10T12:00:00.000Z"
+        put_status_codes.append(500)
+        summary = self.trello.get_doing_tasks_status_changes()
+        self.assertIn("Unable to get doing tasks status changes", summary)
+
+        # the failed update is retried instead of being reported as unchanged
+        put_status_codes.append(200)
+        summary = self.trello.get_doing_tasks_status_changes()
+        self.assertIn("- Completed Tasks That Are Moved to Done:\n", summary)
+        self.assertEqual(put_status_codes, [])
+        # the close summary is only commented once the card is moved
+        actions = [call.args[0] for call in mock_request.call_args_list]
+        self.assertEqual(actions.count("POST"), 1)
+        self.assertEqual(actions[-2:], ["PUT", "POST"])
+
+    @patch("requests.request")
+    def test_doing_tasks_status_changes_failed_checklists(self, mock_request):
+        card_json = load_test_data_json("card_overdue.json")
+        checklists_json = load_test_data_json("card_overdue_checklists.json")
+        self.trello.clock = lambda: datetime(2023, 5, 11, tzinfo=timezone.utc)
+        mock_request.side_effect = [
+            MockJSONResponse([card_json]),
+            MockJSONResponse([{"429": {"message": "API_TOO_MANY_CARDS_REQUESTS"}}]),
+        ]
+        summary = self.trello.get_doing_tasks_status_changes()
+        self.assertEqual(
+            summary,
+            "- Cards Whose Checklists Could Not Be Fetched:\n"
+            f"\t• {card_json['id']}\n",
+        )
+        self.assertNotIn(card_json["id"], self.trello.card_states)
+
+        # the full report lists the card instead of silently dropping it
+        mock_request.side_effect = [
+            MockJSONResponse([card_json]),
+            MockJSONResponse([{"404": {"message": "could not find the card"}}]),
+        ]
+        summary = self.trello.get_doing_tasks_status()
+        self.assertIn("- Cards Whose Checklists Could Not Be Fetched:\n", summary)
+
+        # the checklists are fetched again rather than taken as empty
+        mock_request.side_effect = [
+            MockJSONResponse([card_json]),
+            MockJSONResponse([{"200": checklists_json}]),
+        ]
+        summary = self.trello.get_doing_tasks_status_changes()
+        self.assertIn("- Newly Overdue Tasks:\nOverdue Task 001", summary)
+
+    @patch("requests.request")
+    def test_snapshots_bounded(self, mock_request):
+        self.trello.request_config.max_snapshots = 2
+        mock_request.side_effect = lambda *args, **kwargs: MockResponse(
+            "card_overdue_checklists.json"
+        )
+        for card_id in ["card_1", "card_2", "card_1", "card_3"]:
+            self.trello.get_checklists(card_id=card_id)
+        # the least recently used response is dropped
+        urls = [key[1] for key in self.trello.snapshots]
+        self.assertEqual(
+            urls,
+            [
+                f"{self.trello.url}/cards/card_1/checklists",
+                f"{self.trello.url}/cards/card_3/checklists",
+            ],
+        )
+
+    @patch("time.sleep")
+    @patch("requests.request")
+    def test_response_not_json(self, mock_request, mock_sleep):
+        gateway_response = MockJSONResponse(None)
+        gateway_response.text = "<html>gateway</html>"
+        mock_request.side_effect = [
+            gateway_response,
+            MockResponse("card_overdue_checklists.json"),
+        ]
+        # retried like any other failed request
+        checklists = self.trello.get_checklists(card_id="card_id")
+        self.assertEqual(len(checklists), 2)
+
+        mock_request.side_effect = lambda *args, **kwargs: gateway_response
+        summary = self.trello.get_doing_tasks_status()
+        self.assertTrue(
+            summary.startswith("Unable to get doing tasks status: GET"), summary
+        )
+        self.assertIn("response is not json", summary)
+
+    @patch("requests.request")
+    def test_time_context(self, mock_request):
+        trello_card = TrelloCard(
+            card_json=load_test_data_json("card_overdue.json"),
+            trello_config=self.trello.trello_config,
+        )
+        # idle_threshold is 4320 minutes, the last activity is 2023-05-12 00:05:56
+        self.trello.clock = lambda: datetime(2023, 5, 15, tzinfo=timezone.utc)
+        self.assertFalse(trello_card.is_idle(self.trello.create_time_context()))
+        self.trello.clock = lambda: datetime(2023, 5, 15, 0, 6, tzinfo=timezone.utc)
+        time_context = self.trello.create_time_context()
+        self.assertTrue(trello_card.is_idle(time_context))
+        self.assertEqual(time_context.idle_threshold, 4320 * 60)
+
+        mock_request.side_effect = [MockResponse("card_overdue_checklists.json")]
+        trello_card.checklists = self.trello.get_checklists(card_id=trello_card.id)
+        summary = self.trello._summarize_cards([trello_card])
+        self.assertIn("Idle Task 001", summary)
+
+    @patch("requests.request")
+    def test_bulk_update(self, mock_request):
+        mock_request.side_effect = lambda *args, **kwargs: MockJSONResponse({})
+        done_list_id = self.trello.trello_config.done_list.id
+        self.trello.bulk_update(
+            [
+                CardUpdate(
+                    card_id="card_id",
+                    comment="Marked as done",
+                    complete=True,
+                    list_id=done_list_id,
+                ),
+                CardUpdate(card_id="another_card_id", complete=True),
+            ]
+        )
+        # completing and moving a card is a single request
+        self.assertEqual(mock_request.call_count, 3)
+        actions = sorted(call.args[0] for call in mock_request.call_args_list)
+        self.assertEqual(actions, ["POST", "PUT", "PUT"])
+        put_params = [
+            call.kwargs["params"]
+            for call in mock_request.call_args_list
+            if call.args[1].endswith("/cards/card_id")
+        ]
+        self.assertEqual(put_params[0]["dueComplete"], "true")
+        self.assertEqual(put_params[0]["idList"], done_list_id)
+
+    def test_checklist_render(self):
+        checklist_items = [
+            TrelloCheckListItem(
+                item_json={
+                    "id": f"item_{idx}",
+                    "name": f"Item {idx}",
+                    "state": "complete" if idx % 2 else "incomplete",
+                    "due": f"2023-05-{idx + 1:02}T00:00:00.000Z",
+                }
+            )
+            for idx in range(25)
+        ]
+        checklist = TrelloCheckList(
+            id="checklist_id", name="Milestone", checklist_items=checklist_items
+        )
+        self.assertEqual(checklist.complete_count, 12)
+        self.assertEqual(checklist.incomplete_count, 13)
+        self.assertFalse(checklist.is_complete())
+
+        time_context = TimeContext.create(
+            self.trello.trello_config.idle_threshold,
+            now=datetime(2023, 5, 12, 12, tzinfo=timezone.utc),
+        )
+        content = checklist.render(time_context, max_items=3)
+        lines = content.splitlines()
+        self.assertEqual(lines[0], "\tMilestone (12/25 complete)")
+        self.assertEqual(
+            lines[1], "\t\tearliest overdue: Item 0 (due 2023-05-01 00:00:00+00:00)"
+        )
+        self.assertEqual(
+            lines[2], "\t\tnext due: Item 12 (due 2023-05-13 00:00:00+00:00)"
+        )
+        self.assertEqual(content.count("\t\t• "), 3)
+        self.assertEqual(lines[-1], "\t\t… and 22 more items")
+
+        complete_checklist = TrelloCheckList(
+            id="checklist_id", name="Done", checklist_items=checklist_items[1:2]
+        )
+        self.assertTrue(complete_checklist.is_complete())
+
 
 if __name__ == "__main__":
     unittest.main()